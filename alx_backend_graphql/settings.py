@@ -88,5 +88,31 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 # GraphQL Configuration
 GRAPHENE = {
-    'SCHEMA': 'alx_backend_graphql.schema.schema'
+    'SCHEMA': 'alx_backend_graphql.schema.schema',
+    # `python manage.py graphql_schema` writes the SDL used by the cron clients
+    'SCHEMA_OUTPUT': 'schema.graphql',
 }
+
+# Maximum number of operations in a batched GraphQL request
+GRAPHQL_BATCH_MAX_SIZE = 10
+
+# Background jobs (crm.jobs)
+JOB_RETENTION_DAYS = 7
+
+# Stock reservations (crm.stock)
+STOCK_RESERVATION_MAX_RETRIES = 5
+STOCK_LEDGER_RETENTION_DAYS = 30
+
+# Process-local product cache (crm.cache)
+PRODUCT_CACHE = {
+    'MAX_SIZE': 1000,
+    'TTL': 300,
+}
+
+# Order archiving (crm.archive)
+ORDER_ARCHIVE_HORIZON_DAYS = 365
+ORDER_ARCHIVE_BATCH_SIZE = 500
+
+# Health checks (crm.health)
+HEALTH_CHECK_TIMEOUT = 2.0
+HEARTBEAT_RETENTION_DAYS = 7
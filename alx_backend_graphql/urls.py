@@ -1,9 +1,12 @@
 from django.contrib import admin
 from django.urls import path
-from graphene_django.views import GraphQLView
 from django.views.decorators.csrf import csrf_exempt
+from crm.views import BatchGraphQLView, healthz, metrics, readyz
 
 urlpatterns = [
     path('admin/', admin.site.urls),
-    path('graphql/', csrf_exempt(GraphQLView.as_view(graphiql=True))),
+    path('graphql/', csrf_exempt(BatchGraphQLView.as_view(graphiql=True))),
+    path('metrics/', metrics),
+    path('healthz', healthz),
+    path('readyz', readyz),
 ]
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Startup Benchmark
+Measures the cold-start cost of the CLI and cron entry points
+
+Every entry point is run in a fresh interpreter with `-X importtime`.
+The wall time and the total import time (sum of the `self` column) are
+reported as medians over several runs, together with the slowest
+top-level imports of the last run.
+
+Usage: python benchmarks/bench_startup.py [--runs 5] [--top 5] [--json out.json]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+
+ROOT = Path(__file__).resolve().parent.parent
+
+ENTRY_POINTS = {
+    'manage.py help': ['manage.py', 'help'],
+    'manage.py check': ['manage.py', 'check'],
+    'crm.cron import': ['-c', 'import crm.cron'],
+    'crm.cron client': ['-c', 'from crm.cron import graphql_client; graphql_client()'],
+    'send_order_reminders import': [
+        '-c',
+        "import runpy; runpy.run_path('crm/cron_jobs/send_order_reminders.py', run_name='bench')",
+    ],
+}
+
+
+def parse_importtime(stderr):
+    """
+    Returns (total self time in us, [(cumulative us, module)]) for the
+    top-level imports listed in `-X importtime` output.
+    """
+    total = 0
+    top_level = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, module = line[len('import time:'):].split('|')
+        total += int(self_us)
+        # Nested imports are indented below their parent
+        if not module[1:].startswith(' '):
+            top_level.append((int(cumulative_us), module.strip()))
+    return total, top_level
+
+
+def run_entry_point(argv):
+    env = dict(os.environ, DJANGO_SETTINGS_MODULE='alx_backend_graphql.settings')
+    start = time.perf_counter()
+    proc = subprocess.run(
+        [sys.executable, '-X', 'importtime', *argv],
+        cwd=ROOT, env=env, capture_output=True, text=True,
+    )
+    wall = time.perf_counter() - start
+    if proc.returncode != 0:
+        raise RuntimeError(f"{' '.join(argv)} failed:\n{proc.stderr[-2000:]}")
+    return wall, parse_importtime(proc.stderr)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--top', type=int, default=5)
+    parser.add_argument('--json', help='Also write the results to this file')
+    args = parser.parse_args()
+
+    results = {}
+    for name, argv in ENTRY_POINTS.items():
+        walls, imports = [], []
+        for _ in range(args.runs):
+            wall, (import_us, top_level) = run_entry_point(argv)
+            walls.append(wall * 1000)
+            imports.append(import_us / 1000)
+
+        top_level.sort(reverse=True)
+        results[name] = {
+            'wall_ms': round(statistics.median(walls), 1),
+            'import_ms': round(statistics.median(imports), 1),
+            'slowest_imports': [
+                {'module': module, 'cumulative_ms': round(us / 1000, 1)}
+                for us, module in top_level[:args.top]
+            ],
+        }
+
+    print(f"{'entry point':<30}{'wall ms':>10}{'import ms':>12}")
+    for name, result in results.items():
+        print(f"{name:<30}{result['wall_ms']:>10}{result['import_ms']:>12}")
+        for entry in result['slowest_imports']:
+            print(f"    {entry['module']:<40}{entry['cumulative_ms']:>8} ms")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+Stock Contention Benchmark
+Hammers crm.stock.reserve / release from many threads on one product
+
+Runs against a throwaway SQLite database. After the run it checks that
+no unit was oversold, that the ledger sums to the stock and that
+the version was bumped once per movement, then reports throughput.
+
+Usage: python benchmarks/bench_stock_contention.py [--threads 8] [--stock 500]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+
+def setup_django(db_path):
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'alx_backend_graphql.settings')
+
+    import django
+    from django.conf import settings
+    from django.core.management import call_command
+
+    settings.DATABASES['default']['NAME'] = db_path
+    # Writers queue on SQLite's database lock instead of failing
+    settings.DATABASES['default']['OPTIONS'] = {'timeout': 30}
+    django.setup()
+    call_command('migrate', verbosity=0)
+
+
+def worker(product_id, release_every, counters, lock):
+    from django.db import connection
+    from crm import stock
+
+    reserved = released = conflicts = 0
+    try:
+        while True:
+            try:
+                stock.reserve(product_id, 1, reference=threading.current_thread().name)
+            except stock.InsufficientStock:
+                break
+            except stock.StockConflict:
+                conflicts += 1
+                continue
+            reserved += 1
+
+            if release_every and reserved % release_every == 0:
+                while True:
+                    try:
+                        stock.release(product_id, 1)
+                        break
+                    except stock.StockConflict:
+                        conflicts += 1
+                released += 1
+    finally:
+        connection.close()
+
+    with lock:
+        counters['reserved'] += reserved
+        counters['released'] += released
+        counters['conflicts'] += conflicts
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--stock', type=int, default=500)
+    parser.add_argument('--release-every', type=int, default=5,
+                        help='Each thread releases one unit after every N reservations (0 = never)')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        setup_django(os.path.join(tmp, 'bench.sqlite3'))
+
+        from django.db import connection
+        from django.db.models import Sum
+        from crm.models import Product, StockMovement
+
+        product = Product.objects.create(name='Contended', price=1, stock=args.stock)
+        connection.close()
+
+        counters = {'reserved': 0, 'released': 0, 'conflicts': 0}
+        lock = threading.Lock()
+        threads = [
+            threading.Thread(target=worker, args=(product.id, args.release_every, counters, lock),
+                             name=f'worker-{i}')
+            for i in range(args.threads)
+        ]
+
+        start = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - start
+
+        product.refresh_from_db()
+        movements = StockMovement.objects.filter(product=product)
+        ledger_total = movements.aggregate(total=Sum('quantity'))['total'] or 0
+        operations = counters['reserved'] + counters['released']
+
+        checks = {
+            'not oversold': product.stock == 0 and counters['reserved'] - counters['released'] == args.stock,
+            'ledger matches stock': ledger_total == product.stock,
+            'one version per movement': product.version == operations == movements.filter(
+                kind__in=[StockMovement.KIND_RESERVE, StockMovement.KIND_RELEASE]
+            ).count(),
+        }
+
+        print(f"threads: {args.threads}, initial stock: {args.stock}")
+        print(f"reserved: {counters['reserved']}, released: {counters['released']}, "
+              f"exhausted retries: {counters['conflicts']}")
+        print(f"{operations} operations in {elapsed:.2f}s ({operations / elapsed:.0f} ops/s)")
+        for name, ok in checks.items():
+            print(f"{name}: {'ok' if ok else 'FAILED'}")
+
+        connection.close()
+
+    if not all(checks.values()):
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,6 +1,17 @@
 from django.contrib import admin
-from .models import Customer, Product, Order
+from .models import Customer, Product, Order, ArchivedOrder, StockMovement, Job, Heartbeat
+
+
+class ProductAdmin(admin.ModelAdmin):
+    def get_readonly_fields(self, request, obj=None):
+        # Stock of existing products changes through crm.stock only
+        return Product.STOCK_FIELDS if obj else ('version',)
+
 
 admin.site.register(Customer)
-admin.site.register(Product)
+admin.site.register(Product, ProductAdmin)
 admin.site.register(Order)
+admin.site.register(ArchivedOrder)
+admin.site.register(StockMovement)
+admin.site.register(Job)
+admin.site.register(Heartbeat)
@@ -0,0 +1,164 @@
+"""
+CRM Order Archiving
+Moves orders older than the archive horizon out of the hot Order table
+
+Archived orders keep their ids and product links in ArchivedOrder, so they
+can be restored unchanged. orders_between() is the read path that only
+touches the archive when a date range reaches the archived orders.
+"""
+
+from datetime import datetime, time, timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from crm.models import ArchivedOrder, Order
+
+
+def _batch_size(batch_size):
+    return batch_size or getattr(settings, 'ORDER_ARCHIVE_BATCH_SIZE', 500)
+
+
+def archive_cutoff(horizon_days=None):
+    """
+    Orders placed before the returned datetime belong in the archive.
+    """
+    if horizon_days is None:
+        horizon_days = getattr(settings, 'ORDER_ARCHIVE_HORIZON_DAYS', 365)
+    return timezone.now() - timedelta(days=horizon_days)
+
+
+def archive_orders(horizon_days=None, batch_size=None, include_restored=False):
+    """
+    Moves orders older than the horizon, with their product links, to the
+    archive tables. Each batch is moved in its own transaction.
+
+    Orders brought back by restore_orders stay in the hot table unless
+    `include_restored` is set, so the nightly run does not undo a restore.
+    """
+    cutoff = archive_cutoff(horizon_days)
+    batch_size = _batch_size(batch_size)
+    OrderProducts = Order.products.through
+    ArchivedOrderProducts = ArchivedOrder.products.through
+
+    orders = Order.objects.filter(order_date__lt=cutoff)
+    if not include_restored:
+        orders = orders.filter(restored_at__isnull=True)
+
+    archived = 0
+    while True:
+        with transaction.atomic():
+            batch = list(orders.order_by('id')[:batch_size])
+            if not batch:
+                break
+            order_ids = [order.id for order in batch]
+
+            ArchivedOrder.objects.bulk_create([
+                ArchivedOrder(
+                    id=order.id,
+                    customer_id=order.customer_id,
+                    total_amount=order.total_amount,
+                    order_date=order.order_date,
+                    created_at=order.created_at,
+                )
+                for order in batch
+            ])
+            ArchivedOrderProducts.objects.bulk_create([
+                ArchivedOrderProducts(archivedorder_id=order_id, product_id=product_id)
+                for order_id, product_id in OrderProducts.objects.filter(
+                    order_id__in=order_ids
+                ).values_list('order_id', 'product_id')
+            ])
+            Order.objects.filter(id__in=order_ids).delete()
+
+        archived += len(batch)
+
+    return {'archived': archived}
+
+
+def restore_orders(since=None, until=None, batch_size=None):
+    """
+    Moves archived orders placed in [since, until) back to the Order table.
+    Restored orders are marked with restored_at so archive_orders skips them.
+    """
+    batch_size = _batch_size(batch_size)
+    OrderProducts = Order.products.through
+    ArchivedOrderProducts = ArchivedOrder.products.through
+
+    archived_orders = ArchivedOrder.objects.all()
+    if since is not None:
+        archived_orders = archived_orders.filter(order_date__gte=since)
+    if until is not None:
+        archived_orders = archived_orders.filter(order_date__lt=until)
+
+    restored = 0
+    while True:
+        with transaction.atomic():
+            batch = list(archived_orders.order_by('id')[:batch_size])
+            if not batch:
+                break
+            order_ids = [archived_order.id for archived_order in batch]
+
+            orders = Order.objects.bulk_create([
+                archived_order.as_order() for archived_order in batch
+            ])
+            # bulk_create applies auto_now_add, put the original dates back
+            restored_at = timezone.now()
+            for order, archived_order in zip(orders, batch):
+                order.order_date = archived_order.order_date
+                order.created_at = archived_order.created_at
+                order.restored_at = restored_at
+            Order.objects.bulk_update(orders, ['order_date', 'created_at', 'restored_at'])
+
+            OrderProducts.objects.bulk_create([
+                OrderProducts(order_id=order_id, product_id=product_id)
+                for order_id, product_id in ArchivedOrderProducts.objects.filter(
+                    archivedorder_id__in=order_ids
+                ).values_list('archivedorder_id', 'product_id')
+            ])
+            ArchivedOrder.objects.filter(id__in=order_ids).delete()
+
+        restored += len(batch)
+
+    return {'restored': restored}
+
+
+def _start_of_day(day):
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+def _filter_dates(queryset, start_date, end_date):
+    if start_date is not None:
+        queryset = queryset.filter(order_date__gte=_start_of_day(start_date))
+    if end_date is not None:
+        queryset = queryset.filter(order_date__lt=_start_of_day(end_date + timedelta(days=1)))
+    return queryset
+
+
+def orders_between(start_date=None, end_date=None):
+    """
+    Returns the orders placed between the two dates (inclusive).
+
+    Without a date filter only the hot table is read. The archive is read
+    only when the range starts on or before the newest archived order,
+    which may be newer than the configured horizon (archive_orders
+    --horizon-days).
+    """
+    if start_date is None and end_date is None:
+        return Order.objects.all()
+
+    orders = _filter_dates(Order.objects.all(), start_date, end_date)
+    newest_archived = ArchivedOrder.objects.order_by('-order_date').values_list(
+        'order_date', flat=True
+    ).first()
+    if newest_archived is None or (
+        start_date is not None and _start_of_day(start_date) > newest_archived
+    ):
+        return orders
+
+    archived_orders = _filter_dates(ArchivedOrder.objects.all(), start_date, end_date)
+    return (
+        [archived_order.as_order() for archived_order in archived_orders.order_by('id')]
+        + list(orders.order_by('id'))
+    )
@@ -0,0 +1,194 @@
+"""
+CRM Product Cache
+Process-local LRU/TTL cache of products and a per-request identity map
+
+The cache is invalidated by the Product save/delete signals (crm.signals)
+and by crm.stock after stock updates, once the transaction commits. It is local to each process, so
+changes made by another process become visible after at most the TTL.
+"""
+
+import copy
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+
+from crm.models import Product
+
+
+class ProductCache:
+    def __init__(self, max_size=1000, ttl=300):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        # product id -> (expires_at, product), least recently used first
+        self._entries = OrderedDict()
+        # (expires_at, [product ids]) of the whole catalog
+        self._catalog = None
+        # Bumped by invalidation, so a database read that raced with an
+        # invalidation is not stored afterwards
+        self._generation = 0
+        self._generations = {}
+        self._catalog_generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _lookup(self, product_id, now):
+        entry = self._entries.get(product_id)
+        if entry is None:
+            return None
+        expires_at, product = entry
+        if expires_at <= now:
+            del self._entries[product_id]
+            return None
+        self._entries.move_to_end(product_id)
+        return product
+
+    def _generation_of(self, product_id):
+        return self._generation, self._generations.get(product_id, 0)
+
+    def _store(self, product, now):
+        self._entries[product.id] = (now + self.ttl, product)
+        self._entries.move_to_end(product.id)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def get_many(self, product_ids):
+        """
+        Returns {id: product} for the existing products among `product_ids`.
+        The returned instances are copies and may be modified freely.
+        """
+        now = time.monotonic()
+        found = {}
+        missing = {}
+        with self._lock:
+            for product_id in product_ids:
+                product = self._lookup(product_id, now)
+                if product is None:
+                    missing[product_id] = self._generation_of(product_id)
+                else:
+                    found[product_id] = product
+            self.hits += len(found)
+            self.misses += len(missing)
+
+        if missing:
+            fetched = Product.objects.in_bulk(list(missing))
+            with self._lock:
+                for product in fetched.values():
+                    if self._generation_of(product.id) == missing[product.id]:
+                        self._store(product, now)
+            found.update(fetched)
+
+        return {product_id: copy.copy(product) for product_id, product in found.items()}
+
+    def get(self, product_id):
+        return self.get_many([product_id]).get(product_id)
+
+    def all(self):
+        """
+        Returns all products ordered by id.
+        """
+        now = time.monotonic()
+        with self._lock:
+            catalog = self._catalog
+            if catalog is not None and catalog[0] <= now:
+                catalog = self._catalog = None
+            generation = self._catalog_generation
+
+        if catalog is None:
+            product_ids = list(Product.objects.order_by('id').values_list('id', flat=True))
+            with self._lock:
+                if self._catalog_generation == generation:
+                    self._catalog = (now + self.ttl, product_ids)
+        else:
+            product_ids = catalog[1]
+
+        products = self.get_many(product_ids)
+        return [products[product_id] for product_id in product_ids if product_id in products]
+
+    def invalidate(self, product_id):
+        with self._lock:
+            self._entries.pop(product_id, None)
+            self._generations[product_id] = self._generations.get(product_id, 0) + 1
+
+    def invalidate_catalog(self):
+        with self._lock:
+            self._catalog = None
+            self._catalog_generation += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._catalog = None
+            self._generation += 1
+            self._generations.clear()
+            self._catalog_generation += 1
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._entries),
+                'max_size': self.max_size,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_ratio': round(self.hits / lookups, 4) if lookups else None,
+            }
+
+
+_config = getattr(settings, 'PRODUCT_CACHE', {})
+product_cache = ProductCache(
+    max_size=_config.get('MAX_SIZE', 1000),
+    ttl=_config.get('TTL', 300),
+)
+
+
+def _identity_map(context):
+    # The GraphQL context is the HttpRequest, shared by batched operations
+    identity_map = getattr(context, '_crm_products', None)
+    if identity_map is None:
+        identity_map = {}
+        if context is not None:
+            context._crm_products = identity_map
+    return identity_map
+
+
+def get_products(product_ids, context=None):
+    """
+    Returns {id: product} for the existing products among `product_ids`.
+    Within one request each product is materialized only once.
+    """
+    identity_map = _identity_map(context)
+    ids = set()
+    for product_id in product_ids:
+        try:
+            ids.add(int(product_id))
+        except (TypeError, ValueError):
+            continue
+
+    missing = [product_id for product_id in ids if product_id not in identity_map]
+    if missing:
+        identity_map.update(product_cache.get_many(missing))
+    return {product_id: identity_map[product_id] for product_id in ids if product_id in identity_map}
+
+
+def remember(context, product):
+    """
+    Replaces the request's instance of `product` after it was changed.
+    """
+    _identity_map(context)[product.id] = product
+
+
+def all_products(context=None):
+    """
+    Returns all products, reusing instances already materialized in the request.
+    """
+    identity_map = _identity_map(context)
+    products = []
+    for product in product_cache.all():
+        products.append(identity_map.setdefault(product.id, product))
+    return products
@@ -1,52 +1,56 @@
 """
 CRM Cron Jobs
-Heartbeat logger to monitor application health
+Heartbeat recorder to monitor application health
+
+gql and requests are imported inside the jobs so that loading this
+module (django-crontab does it on every run) stays cheap.
 """
 
 from datetime import datetime
-from gql import gql, Client
-from gql.transport.requests import RequestsHTTPTransport
+from pathlib import Path
+
+
+GRAPHQL_URL = 'http://localhost:8000/graphql/'
+
+# Generated at build time with `python manage.py graphql_schema`
+SCHEMA_FILE = Path(__file__).resolve().parent.parent / 'schema.graphql'
+
+
+def graphql_client(url=None, timeout=None):
+    """
+    Returns a gql client for the CRM endpoint.
+    Documents are validated against the cached SDL instead of fetching
+    the schema over introspection; without the file no validation is done.
+    """
+    from gql import Client
+    from gql.transport.requests import RequestsHTTPTransport
+
+    schema = SCHEMA_FILE.read_text() if SCHEMA_FILE.exists() else None
+    transport = RequestsHTTPTransport(url=url or GRAPHQL_URL, timeout=timeout)
+    return Client(transport=transport, schema=schema, fetch_schema_from_transport=False)
 
 
 def log_crm_heartbeat():
     """
-    Logs a heartbeat message every 5 minutes to confirm CRM health.
-    Queries GraphQL hello field to verify endpoint responsiveness.
+    Records a heartbeat every 5 minutes to confirm CRM health.
+    Probes the served GraphQL endpoint and runs the crm.health checks
+    (database, schema execution, cache), and stores their outcome and
+    latency as a Heartbeat, served by /readyz.
     """
+    from crm.health import record_heartbeat
+
     # Get current timestamp in DD/MM/YYYY-HH:MM:SS format
     timestamp = datetime.now().strftime('%d/%m/%Y-%H:%M:%S')
-    
-    # Base log message
-    log_message = f"{timestamp} CRM is alive"
-    
-    # Query GraphQL hello field to verify endpoint
-    try:
-        # Setup GraphQL client
-        transport = RequestsHTTPTransport(url='http://localhost:8000/graphql')
-        client = Client(transport=transport, fetch_schema_from_transport=False)
-        
-        # Query hello field
-        query = gql('''
-            query {
-                hello
-            }
-        ''')
-        
-        result = client.execute(query)
-        
-        if result.get('hello'):
-            log_message += " - GraphQL endpoint responsive"
-        else:
-            log_message += " - GraphQL endpoint not responding"
-            
-    except Exception as e:
-        log_message += f" - GraphQL check failed: {str(e)}"
-    
-    # Append to log file
-    log_file = '/tmp/crm_heartbeat_log.txt'
-    with open(log_file, 'a') as f:
-        f.write(log_message + '\n')
-    
+
+    heartbeat = record_heartbeat()
+
+    if heartbeat.ok:
+        endpoint_ms = heartbeat.checks['endpoint']['latency_ms']
+        log_message = f"{timestamp} CRM is alive - GraphQL endpoint responded in {endpoint_ms:.1f} ms"
+    else:
+        failed = ', '.join(name for name, check in heartbeat.checks.items() if not check['ok'])
+        log_message = f"{timestamp} CRM health check failed: {failed}"
+
     print(log_message)
 
 
@@ -55,17 +59,14 @@ def update_low_stock():
     Updates low stock products (stock < 10) by executing GraphQL mutation.
     Runs every 12 hours.
     """
-    from datetime import datetime
-    from gql import gql, Client
-    from gql.transport.requests import RequestsHTTPTransport
-    
+    from gql import gql
+
     # Get current timestamp
     timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
     
     try:
         # Setup GraphQL client
-        transport = RequestsHTTPTransport(url='http://localhost:8000/graphql')
-        client = Client(transport=transport, fetch_schema_from_transport=False)
+        client = graphql_client()
         
         # Execute UpdateLowStockProducts mutation
         mutation = gql('''
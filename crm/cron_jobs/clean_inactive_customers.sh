@@ -11,23 +11,10 @@ TIMESTAMP=$(date '+%Y-%m-%d %H:%M:%S')
 
 # Run Django command to delete inactive customers
 DELETED_COUNT=$(python manage.py shell << PYTHON_EOF
-from crm.models import Customer, Order
-from datetime import datetime, timedelta
-from django.utils import timezone
+from crm.tasks import clean_inactive_customers
 
-# Calculate date one year ago
-one_year_ago = timezone.now() - timedelta(days=365)
-
-# Find customers with no orders in the past year
-inactive_customers = Customer.objects.exclude(
-    orders__created_at__gte=one_year_ago
-)
-
-# Count and delete
-count = inactive_customers.count()
-inactive_customers.delete()
-
-print(count)
+# Delete customers with no orders in the past year and print the count
+print(clean_inactive_customers()['deleted'])
 PYTHON_EOF
 )
 
@@ -0,0 +1,270 @@
+"""
+CRM Health
+Deep health checks, heartbeat recording and GraphQL latency histograms
+
+Checks run in a fixed pool of daemon threads with a timeout
+(HEALTH_CHECK_TIMEOUT seconds), so a hung database cannot hang the
+readiness response. The timeout only bounds the response: a hung check
+keeps its thread until it returns, and is reported as failed without
+being run again until then. Daemon threads do not keep the process alive
+on exit. Latency histograms are kept per process over a rolling window.
+"""
+
+import bisect
+import queue
+import threading
+import time
+from concurrent.futures import Future, TimeoutError
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection
+from django.utils import timezone
+
+from crm.cache import product_cache
+from crm.models import Heartbeat
+
+
+# Upper bounds of the latency buckets, in milliseconds
+LATENCY_BUCKETS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+
+class RollingHistogram:
+    """
+    Latency histogram over the last `window` seconds, kept as `slots`
+    rotating sub-histograms so old observations expire in steps.
+    """
+
+    def __init__(self, buckets=LATENCY_BUCKETS_MS, window=300, slots=5):
+        self.buckets = buckets
+        self.slot_seconds = window / slots
+        self._lock = threading.Lock()
+        # Each slot: [slot start, counts per bucket (+ overflow), sum in ms]
+        self._slots = [[0, [0] * (len(buckets) + 1), 0.0] for _ in range(slots)]
+
+    def _slot(self, now):
+        start = int(now // self.slot_seconds)
+        slot = self._slots[start % len(self._slots)]
+        if slot[0] != start:
+            slot[0] = start
+            slot[1] = [0] * (len(self.buckets) + 1)
+            slot[2] = 0.0
+        return slot
+
+    def observe(self, seconds):
+        milliseconds = seconds * 1000
+        with self._lock:
+            slot = self._slot(time.monotonic())
+            slot[1][bisect.bisect_left(self.buckets, milliseconds)] += 1
+            slot[2] += milliseconds
+
+    def snapshot(self):
+        now = time.monotonic()
+        oldest = int(now // self.slot_seconds) - len(self._slots) + 1
+        counts = [0] * (len(self.buckets) + 1)
+        total_ms = 0.0
+        with self._lock:
+            for start, slot_counts, slot_sum in self._slots:
+                if start >= oldest:
+                    counts = [a + b for a, b in zip(counts, slot_counts)]
+                    total_ms += slot_sum
+
+        count = sum(counts)
+        labels = [f"le_{bound}" for bound in self.buckets] + ['le_inf']
+        return {
+            'window_seconds': self.slot_seconds * len(self._slots),
+            'count': count,
+            'mean_ms': round(total_ms / count, 2) if count else None,
+            'p50_ms': self._quantile(counts, count, 0.5),
+            'p95_ms': self._quantile(counts, count, 0.95),
+            'p99_ms': self._quantile(counts, count, 0.99),
+            'buckets': dict(zip(labels, counts)),
+        }
+
+    def _quantile(self, counts, count, q):
+        # Upper bound of the bucket holding the quantile; '+Inf' past the last bucket
+        if not count:
+            return None
+        seen = 0
+        for bound, bucket_count in zip(self.buckets, counts):
+            seen += bucket_count
+            if seen >= q * count:
+                return bound
+        return '+Inf'
+
+
+graphql_latency = RollingHistogram()
+
+
+# Checks
+
+def check_database():
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT 1')
+        cursor.fetchone()
+
+
+def check_schema():
+    from alx_backend_graphql.schema import schema
+
+    result = schema.execute('{ __typename }')
+    if result.errors:
+        raise Exception(result.errors[0].message)
+
+
+def check_cache():
+    return product_cache.stats()
+
+
+CHECKS = {
+    'database': check_database,
+    'schema': check_schema,
+    'cache': check_cache,
+}
+
+
+def check_endpoint():
+    """
+    Round trip through the served GraphQL endpoint (crm.cron.GRAPHQL_URL).
+    Not part of CHECKS: /readyz would otherwise call its own server.
+    """
+    from gql import gql
+    from crm.cron import graphql_client
+
+    timeout = getattr(settings, 'HEALTH_CHECK_TIMEOUT', 2.0)
+    result = graphql_client(timeout=timeout).execute(gql('{ __typename }'))
+    if result.get('__typename') != 'Query':
+        raise Exception(f"Unexpected response: {result}")
+
+
+class CheckExecutor:
+    """
+    Runs submitted calls on at most `max_workers` daemon threads.
+    Unlike ThreadPoolExecutor, a hung call does not block interpreter exit.
+    """
+
+    def __init__(self, max_workers):
+        self.max_workers = max_workers
+        self._queue = queue.SimpleQueue()
+        self._lock = threading.Lock()
+        self._threads = []
+
+    def submit(self, fn, *args):
+        future = Future()
+        self._queue.put((future, fn, args))
+        with self._lock:
+            if len(self._threads) < self.max_workers:
+                thread = threading.Thread(
+                    target=self._work, name=f"health-check-{len(self._threads)}", daemon=True
+                )
+                thread.start()
+                self._threads.append(thread)
+        return future
+
+    def _work(self):
+        while True:
+            future, fn, args = self._queue.get()
+            if not future.set_running_or_notify_cancel():
+                continue
+            try:
+                future.set_result(fn(*args))
+            except BaseException as e:
+                future.set_exception(e)
+
+
+# One thread per check, the endpoint probe included
+executor = CheckExecutor(max_workers=len(CHECKS) + 1)
+
+# check -> future of its latest run
+_in_flight = {}
+_in_flight_lock = threading.Lock()
+
+
+def _timed(check):
+    start = time.perf_counter()
+    try:
+        details = check()
+    finally:
+        # Checks run in pool threads, each with its own connection
+        connection.close()
+    return (time.perf_counter() - start) * 1000, details
+
+
+def run_checks(timeout=None, checks=None):
+    """
+    Runs the checks concurrently and returns their outcome and latency.
+    Returns after at most `timeout` seconds, see the module docstring.
+    """
+    if timeout is None:
+        timeout = getattr(settings, 'HEALTH_CHECK_TIMEOUT', 2.0)
+    if checks is None:
+        checks = CHECKS
+
+    start = time.perf_counter()
+    results = dict.fromkeys(checks)
+    futures = {}
+    with _in_flight_lock:
+        for name, check in checks.items():
+            previous = _in_flight.get(check)
+            if previous is not None and not previous.done():
+                # Still hung since an earlier run, do not pile up threads
+                results[name] = {'ok': False, 'error': "Still running since a previous run"}
+            else:
+                futures[name] = _in_flight[check] = executor.submit(_timed, check)
+    deadline = time.monotonic() + timeout
+
+    for name, future in futures.items():
+        try:
+            latency_ms, details = future.result(timeout=max(0, deadline - time.monotonic()))
+            results[name] = {'ok': True, 'latency_ms': round(latency_ms, 2)}
+            if details:
+                results[name]['details'] = details
+        except TimeoutError:
+            results[name] = {'ok': False, 'error': f"Timed out after {timeout}s"}
+        except Exception as e:
+            results[name] = {'ok': False, 'error': str(e)}
+
+    return {
+        'ok': all(result['ok'] for result in results.values()),
+        'latency_ms': round((time.perf_counter() - start) * 1000, 2),
+        'checks': results,
+    }
+
+
+def record_heartbeat():
+    """
+    Probes the GraphQL endpoint and runs the in-process checks, stores the
+    outcome as a Heartbeat and prunes old ones.
+
+    When the database check fails the Heartbeat is returned unsaved:
+    writing it would block on the same database without a timeout.
+    """
+    outcome = run_checks(checks={'endpoint': check_endpoint, **CHECKS})
+    heartbeat = Heartbeat(
+        ok=outcome['ok'],
+        latency_ms=outcome['latency_ms'],
+        checks=outcome['checks'],
+    )
+    if not outcome['checks']['database']['ok']:
+        return heartbeat
+
+    heartbeat.save()
+
+    retention_days = getattr(settings, 'HEARTBEAT_RETENTION_DAYS', 7)
+    Heartbeat.objects.filter(
+        checked_at__lt=timezone.now() - timedelta(days=retention_days)
+    ).delete()
+
+    return heartbeat
+
+
+def last_heartbeat():
+    heartbeat = Heartbeat.objects.order_by('-checked_at').first()
+    if heartbeat is None:
+        return None
+    return {
+        'ok': heartbeat.ok,
+        'latency_ms': heartbeat.latency_ms,
+        'checked_at': heartbeat.checked_at.isoformat(),
+        'age_seconds': round((timezone.now() - heartbeat.checked_at).total_seconds()),
+    }
@@ -0,0 +1,255 @@
+"""
+CRM Job Queue
+Database-backed job queue used by the run_workers management command
+"""
+
+import threading
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from crm.models import Job
+
+
+_current = threading.local()
+
+
+def enqueue(task, **payload):
+    """
+    Queues a job for the dotted-path callable `task`.
+    The payload is passed to the callable as keyword arguments.
+    """
+    return Job.objects.create(task=task, payload=payload)
+
+
+def claim_next():
+    """
+    Atomically moves the oldest pending job to running and returns it.
+    Returns None when the queue is empty.
+    """
+    while True:
+        job_id = (
+            Job.objects.filter(status=Job.STATUS_PENDING)
+            .order_by('created_at', 'id')
+            .values_list('id', flat=True)
+            .first()
+        )
+        if job_id is None:
+            return None
+
+        # Another worker may have claimed the same row in the meantime
+        claimed = Job.objects.filter(id=job_id, status=Job.STATUS_PENDING).update(
+            status=Job.STATUS_RUNNING,
+            started_at=timezone.now(),
+        )
+        if claimed:
+            return Job.objects.get(id=job_id)
+
+
+def run_job(job_id):
+    """
+    Executes a claimed job and stores its result or error.
+    Storing the result is part of the job: a result that cannot be saved,
+    e.g. because it is not JSON-serializable, fails the job.
+    """
+    job = Job.objects.get(id=job_id)
+    _current.job_id = job.id
+    try:
+        func = import_string(job.task)
+        result = func(**job.payload)
+        # Savepoint, so a failed save still lets mark_failed() run
+        with transaction.atomic():
+            Job.objects.filter(id=job.id).update(
+                status=Job.STATUS_SUCCEEDED,
+                progress=100,
+                result=result,
+                finished_at=timezone.now(),
+            )
+        return Job.STATUS_SUCCEEDED
+    except Exception:
+        mark_failed(job.id, traceback.format_exc())
+        return Job.STATUS_FAILED
+    finally:
+        _current.job_id = None
+
+
+def mark_failed(job_id, error):
+    """
+    Fails a job that is still running, e.g. after its worker crashed.
+    """
+    return Job.objects.filter(id=job_id, status=Job.STATUS_RUNNING).update(
+        status=Job.STATUS_FAILED,
+        error=error,
+        finished_at=timezone.now(),
+    )
+
+
+def report_progress(percent):
+    """
+    Updates the progress of the job running in this thread.
+    Does nothing when called outside of a job, e.g. from django-crontab.
+    """
+    job_id = getattr(_current, 'job_id', None)
+    if job_id is None:
+        return
+    percent = max(0, min(100, int(percent)))
+    Job.objects.filter(id=job_id).update(progress=percent)
+
+
+def requeue_stale():
+    """
+    Puts jobs left running by a worker that died back in the queue.
+    Only safe to call before any worker has started.
+    """
+    return Job.objects.filter(status=Job.STATUS_RUNNING).update(
+        status=Job.STATUS_PENDING,
+        started_at=None,
+        progress=0,
+    )
+
+
+def prune_finished(retention_days=None):
+    """
+    Deletes succeeded and failed jobs that finished more than
+    JOB_RETENTION_DAYS ago, with their payloads and results.
+    """
+    if retention_days is None:
+        retention_days = getattr(settings, 'JOB_RETENTION_DAYS', 7)
+    deleted, _ = Job.objects.filter(
+        status__in=[Job.STATUS_SUCCEEDED, Job.STATUS_FAILED],
+        finished_at__lt=timezone.now() - timedelta(days=retention_days),
+    ).delete()
+    return {'deleted': deleted}
+
+
+# Cron scheduling
+
+CRON_MACROS = {
+    '@yearly': '0 0 1 1 *',
+    '@annually': '0 0 1 1 *',
+    '@monthly': '0 0 1 * *',
+    '@weekly': '0 0 * * 0',
+    '@daily': '0 0 * * *',
+    '@midnight': '0 0 * * *',
+    '@hourly': '0 * * * *',
+}
+
+MONTH_NAMES = ['jan', 'feb', 'mar', 'apr', 'may', 'jun',
+               'jul', 'aug', 'sep', 'oct', 'nov', 'dec']
+WEEKDAY_NAMES = ['sun', 'mon', 'tue', 'wed', 'thu', 'fri', 'sat']
+
+
+def _cron_value(value, minimum, maximum, names):
+    if names and value.lower() in names:
+        return names.index(value.lower()) + minimum
+    if not value.isdigit() or not minimum <= int(value) <= maximum:
+        raise ValueError(f"{value!r} is not in {minimum}-{maximum}")
+    return int(value)
+
+
+def _parse_cron_field(field, minimum, maximum, names=None):
+    values = set()
+    for part in field.split(','):
+        step = 1
+        if '/' in part:
+            part, step = part.split('/', 1)
+            if not step.isdigit() or int(step) == 0:
+                raise ValueError(f"Invalid step in {field!r}")
+            step = int(step)
+
+        if part == '*':
+            start, end = minimum, maximum
+        elif '-' in part:
+            start, end = (_cron_value(v, minimum, maximum, names) for v in part.split('-', 1))
+            if start > end:
+                raise ValueError(f"Invalid range in {field!r}")
+        else:
+            start = _cron_value(part, minimum, maximum, names)
+            end = maximum if step > 1 else start
+
+        values.update(range(start, end + 1, step))
+    return values
+
+
+def parse_cron(expression):
+    """
+    Parses a crontab expression into the sets of matching minutes, hours,
+    days, months and weekdays (Sunday = 0), plus whether day and weekday
+    are restricted. Supports *, numbers, names, ranges, lists, steps and
+    the @hourly ... @yearly macros. Raises ValueError if it is invalid.
+    """
+    expression = CRON_MACROS.get(expression.strip().lower(), expression)
+    fields = expression.split()
+    if len(fields) != 5:
+        raise ValueError(f"Expected five fields or a macro, got {expression!r}")
+    minute, hour, day, month, weekday = fields
+
+    weekdays = _parse_cron_field(weekday, 0, 7, WEEKDAY_NAMES)
+    if 7 in weekdays:
+        weekdays = (weekdays - {7}) | {0}
+    return (
+        _parse_cron_field(minute, 0, 59),
+        _parse_cron_field(hour, 0, 23),
+        _parse_cron_field(day, 1, 31),
+        _parse_cron_field(month, 1, 12, MONTH_NAMES),
+        weekdays,
+        # Like cron, a field starting with * does not restrict the day
+        not day.startswith('*'),
+        not weekday.startswith('*'),
+    )
+
+
+def cron_matches(expression, moment):
+    """
+    Returns True if the crontab expression fires at `moment`.
+    When both day of month and weekday are restricted, either one matching
+    is enough, as in cron.
+    """
+    minutes, hours, days, months, weekdays, day_restricted, weekday_restricted = parse_cron(expression)
+    # crontab counts weekdays from Sunday = 0
+    day_matches = moment.day in days
+    weekday_matches = (moment.weekday() + 1) % 7 in weekdays
+    if day_restricted and weekday_restricted:
+        day_matches = weekday_matches = day_matches or weekday_matches
+
+    return (
+        moment.minute in minutes
+        and moment.hour in hours
+        and moment.month in months
+        and day_matches
+        and weekday_matches
+    )
+
+
+def check_cron_entry(entry):
+    """
+    Raises ValueError if the django-crontab `entry` cannot be enqueued.
+    Positional arguments are rejected: job payloads are keyword arguments.
+    """
+    if len(entry) < 2:
+        raise ValueError("Expected (expression, task, ...)")
+    parse_cron(entry[0])
+    import_string(entry[1])
+    if len(entry) > 2 and entry[2]:
+        raise ValueError("Positional arguments are not supported, pass them as keyword arguments")
+    if len(entry) > 3 and not isinstance(entry[3], dict):
+        raise ValueError("Keyword arguments must be a dict")
+
+
+def schedule_cron_jobs(cronjobs, moment):
+    """
+    Enqueues every (expression, task, args, kwargs) entry of `cronjobs`
+    due at `moment`. Returns the created jobs.
+    The entries are expected to pass check_cron_entry().
+    """
+    jobs = []
+    for entry in cronjobs:
+        expression, task = entry[0], entry[1]
+        if cron_matches(expression, moment):
+            kwargs = entry[3] if len(entry) > 3 else {}
+            jobs.append(enqueue(task, **kwargs))
+    return jobs
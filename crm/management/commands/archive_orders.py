@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from crm.archive import archive_orders
+
+
+class Command(BaseCommand):
+    help = "Moves orders older than the archive horizon to the archive tables"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--horizon-days', type=int,
+                            help='Archive orders older than this many days (default: ORDER_ARCHIVE_HORIZON_DAYS)')
+        parser.add_argument('--batch-size', type=int,
+                            help='Orders moved per transaction (default: ORDER_ARCHIVE_BATCH_SIZE)')
+        parser.add_argument('--include-restored', action='store_true',
+                            help='Also archive orders brought back by restore_orders')
+
+    def handle(self, *args, **options):
+        result = archive_orders(
+            options['horizon_days'], options['batch_size'], options['include_restored']
+        )
+        self.stdout.write(f"Archived {result['archived']} orders")
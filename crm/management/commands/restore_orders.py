@@ -0,0 +1,26 @@
+from datetime import date, datetime, time
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from crm.archive import restore_orders
+
+
+def _parse_date(value):
+    return timezone.make_aware(datetime.combine(date.fromisoformat(value), time.min))
+
+
+class Command(BaseCommand):
+    help = "Moves archived orders back to the Order table"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--since', type=_parse_date,
+                            help='Restore orders placed on or after this date (YYYY-MM-DD)')
+        parser.add_argument('--until', type=_parse_date,
+                            help='Restore orders placed before this date (YYYY-MM-DD)')
+        parser.add_argument('--batch-size', type=int,
+                            help='Orders moved per transaction (default: ORDER_ARCHIVE_BATCH_SIZE)')
+
+    def handle(self, *args, **options):
+        result = restore_orders(options['since'], options['until'], options['batch_size'])
+        self.stdout.write(f"Restored {result['restored']} orders")
@@ -0,0 +1,97 @@
+import multiprocessing
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from crm import jobs
+from crm.models import Job
+from crm.settings import CRONJOBS
+from crm.workers import execute_job, init_worker
+
+
+class Command(BaseCommand):
+    help = "Runs queued CRM jobs in a process pool and schedules the CRONJOBS entries"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--concurrency', type=int, default=multiprocessing.cpu_count(),
+                            help='Number of worker processes')
+        parser.add_argument('--poll-interval', type=float, default=1.0,
+                            help='Seconds to wait between queue polls')
+        parser.add_argument('--no-schedule', action='store_true',
+                            help='Do not enqueue CRONJOBS entries (when another worker does)')
+        parser.add_argument('--requeue-stale', action='store_true',
+                            help='Requeue jobs left running by a previous worker on startup')
+        parser.add_argument('--burst', action='store_true',
+                            help='Exit once the queue is empty')
+
+    def handle(self, *args, **options):
+        concurrency = max(1, options['concurrency'])
+        poll_interval = options['poll_interval']
+
+        if not options['no_schedule']:
+            self._check_cronjobs()
+
+        if options['requeue_stale']:
+            count = jobs.requeue_stale()
+            self.stdout.write(f"Requeued {count} stale jobs")
+
+        self.stdout.write(f"Starting {concurrency} workers")
+        # Spawned workers do not inherit the parent's database connections
+        context = multiprocessing.get_context('spawn')
+        # future -> id of the job it runs
+        running = {}
+        last_tick = None
+
+        with ProcessPoolExecutor(max_workers=concurrency, mp_context=context,
+                                 initializer=init_worker) as pool:
+            try:
+                while True:
+                    if not options['no_schedule']:
+                        tick = timezone.localtime().replace(second=0, microsecond=0)
+                        if tick != last_tick:
+                            for job in jobs.schedule_cron_jobs(CRONJOBS, tick):
+                                self.stdout.write(f"Scheduled {job}")
+                            last_tick = tick
+
+                    for future in [future for future in running if future.done()]:
+                        self._finish(future, running.pop(future))
+
+                    while len(running) < concurrency:
+                        job = jobs.claim_next()
+                        if job is None:
+                            break
+                        running[pool.submit(execute_job, job.id)] = job.id
+
+                    if options['burst'] and not running:
+                        break
+
+                    if running:
+                        wait(running, timeout=poll_interval, return_when=FIRST_COMPLETED)
+                    else:
+                        time.sleep(poll_interval)
+            except KeyboardInterrupt:
+                self.stdout.write("Stopping workers, waiting for running jobs")
+
+    def _check_cronjobs(self):
+        # A bad entry would otherwise fail the scheduler loop when it comes due
+        errors = []
+        for entry in CRONJOBS:
+            try:
+                jobs.check_cron_entry(entry)
+            except (ValueError, ImportError) as e:
+                errors.append(f"  {entry!r}: {e}")
+        if errors:
+            raise CommandError("Invalid CRONJOBS entries:\n" + "\n".join(errors))
+
+    def _finish(self, future, job_id):
+        try:
+            status = future.result()
+        except Exception as e:
+            # The worker process died or run_job itself failed
+            jobs.mark_failed(job_id, f"Worker error: {e!r}")
+            self.stderr.write(f"Job {job_id} failed in the worker: {e!r}")
+            return
+        if status == Job.STATUS_FAILED:
+            self.stderr.write(f"Job {job_id} failed")
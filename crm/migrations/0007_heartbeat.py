@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-19 10:25
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('crm', '0006_archived_order'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Heartbeat',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('checked_at', models.DateTimeField(auto_now_add=True, db_index=True)),
+                ('ok', models.BooleanField()),
+                ('latency_ms', models.FloatField()),
+                ('checks', models.JSONField(default=dict)),
+            ],
+        ),
+    ]
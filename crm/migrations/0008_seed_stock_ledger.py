@@ -0,0 +1,23 @@
+from django.db import migrations
+
+
+def seed_stock_ledger(apps, schema_editor):
+    """Records the stock of existing products so the ledger sums to it."""
+    Product = apps.get_model('crm', 'Product')
+    StockMovement = apps.get_model('crm', 'StockMovement')
+    StockMovement.objects.bulk_create([
+        StockMovement(product_id=product_id, kind='restock', quantity=stock, reference='initial')
+        for product_id, stock in Product.objects.exclude(stock=0).values_list('id', 'stock')
+        if not StockMovement.objects.filter(product_id=product_id).exists()
+    ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('crm', '0007_heartbeat'),
+    ]
+
+    operations = [
+        migrations.RunPython(seed_stock_ledger, migrations.RunPython.noop),
+    ]
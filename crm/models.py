@@ -1,4 +1,5 @@
-from django.db import models
+from django.db import models, transaction
+from django.utils import timezone
 
 
 class Customer(models.Model):
@@ -16,18 +17,179 @@ class Product(models.Model):
     description = models.TextField(blank=True, null=True)
     price = models.DecimalField(max_digits=10, decimal_places=2)
     stock = models.IntegerField(default=0)
+    # Bumped on every stock change, see crm.stock
+    version = models.PositiveIntegerField(default=0)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    # Only crm.stock changes these once the product exists
+    STOCK_FIELDS = ('stock', 'version')
+
     def __str__(self):
         return self.name
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        product = super().from_db(db, field_names, values)
+        product._remember_stock()
+        return product
+
+    def refresh_from_db(self, *args, **kwargs):
+        super().refresh_from_db(*args, **kwargs)
+        self._remember_stock()
+
+    def _remember_stock(self):
+        # Stock fields as last read from or written to the database
+        self._saved_stock = {
+            name: self.__dict__[name] for name in self.STOCK_FIELDS if name in self.__dict__
+        }
+
+    def save(self, *args, **kwargs):
+        """
+        Saving an existing product never writes stock or version, so a stale
+        instance cannot overwrite concurrent reservations. Changing them on
+        the instance raises StockError; use crm.stock.restock, reserve or
+        release instead. The initial stock of a new product is recorded in
+        the ledger.
+        """
+        adding = self._state.adding
+        if not adding:
+            saved_stock = getattr(self, '_saved_stock', {})
+            changed = [
+                name for name, value in saved_stock.items() if self.__dict__.get(name) != value
+            ]
+            if changed:
+                from crm.stock import StockError
+
+                raise StockError(
+                    f"{', '.join(changed)} of {self} changed on the instance, "
+                    "use crm.stock.restock, reserve or release"
+                )
+            update_fields = kwargs.get('update_fields')
+            if update_fields is None:
+                update_fields = [field.name for field in self._meta.concrete_fields if not field.primary_key]
+            kwargs['update_fields'] = [
+                name for name in update_fields if name not in self.STOCK_FIELDS
+            ]
+
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            if adding and self.stock:
+                StockMovement.objects.create(
+                    product=self,
+                    kind=StockMovement.KIND_RESTOCK,
+                    quantity=self.stock,
+                    reference='initial',
+                )
+        self._remember_stock()
+
 
 class Order(models.Model):
     customer = models.ForeignKey(Customer, on_delete=models.CASCADE, related_name='orders')
     products = models.ManyToManyField(Product, related_name='orders')
     total_amount = models.DecimalField(max_digits=10, decimal_places=2, default=0)
-    order_date = models.DateTimeField(auto_now_add=True)
+    order_date = models.DateTimeField(auto_now_add=True, db_index=True)
     created_at = models.DateTimeField(auto_now_add=True)
+    # Set by crm.archive.restore_orders; archive_orders skips restored orders
+    restored_at = models.DateTimeField(blank=True, null=True)
 
     def __str__(self):
         return f"Order {self.id} - {self.customer.name}"
+
+
+class ArchivedOrder(models.Model):
+    """Order moved out of the hot table by crm.archive."""
+
+    # Same id as the archived Order, so restoring keeps it
+    id = models.BigIntegerField(primary_key=True)
+    customer = models.ForeignKey(Customer, on_delete=models.CASCADE, related_name='archived_orders')
+    products = models.ManyToManyField(Product, related_name='archived_orders')
+    total_amount = models.DecimalField(max_digits=10, decimal_places=2, default=0)
+    order_date = models.DateTimeField(db_index=True)
+    created_at = models.DateTimeField()
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"Archived order {self.id} - {self.customer.name}"
+
+    def as_order(self):
+        """
+        Returns an unsaved Order with this order's data, for read paths that
+        serve hot and archived orders together.
+        """
+        order = Order(
+            id=self.id,
+            customer_id=self.customer_id,
+            total_amount=self.total_amount,
+            order_date=self.order_date,
+            created_at=self.created_at,
+        )
+        order.archived_order = self
+        return order
+
+
+class StockMovement(models.Model):
+    KIND_RESERVE = 'reserve'
+    KIND_RELEASE = 'release'
+    KIND_RESTOCK = 'restock'
+    KIND_COMPACTED = 'compacted'
+    KIND_CHOICES = [
+        (KIND_RESERVE, 'Reserve'),
+        (KIND_RELEASE, 'Release'),
+        (KIND_RESTOCK, 'Restock'),
+        (KIND_COMPACTED, 'Compacted'),
+    ]
+
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='stock_movements')
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    # Signed change applied to Product.stock
+    quantity = models.IntegerField()
+    reference = models.CharField(max_length=100, blank=True, default='')
+    # Not auto_now_add: compaction keeps the time of the newest merged movement
+    created_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [models.Index(fields=['product', 'created_at'])]
+
+    def __str__(self):
+        return f"{self.kind} {self.quantity} of {self.product_id}"
+
+
+class Job(models.Model):
+    STATUS_PENDING = 'pending'
+    STATUS_RUNNING = 'running'
+    STATUS_SUCCEEDED = 'succeeded'
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = [
+        (STATUS_PENDING, 'Pending'),
+        (STATUS_RUNNING, 'Running'),
+        (STATUS_SUCCEEDED, 'Succeeded'),
+        (STATUS_FAILED, 'Failed'),
+    ]
+
+    task = models.CharField(max_length=255)
+    payload = models.JSONField(default=dict, blank=True)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=STATUS_PENDING)
+    progress = models.PositiveSmallIntegerField(default=0)
+    result = models.JSONField(blank=True, null=True)
+    error = models.TextField(blank=True, default='')
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(blank=True, null=True)
+    finished_at = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        indexes = [models.Index(fields=['status', 'created_at'])]
+
+    def __str__(self):
+        return f"Job {self.id} - {self.task} ({self.status})"
+
+
+class Heartbeat(models.Model):
+    """Outcome of a crm.health heartbeat run."""
+
+    checked_at = models.DateTimeField(auto_now_add=True, db_index=True)
+    ok = models.BooleanField()
+    latency_ms = models.FloatField()
+    checks = models.JSONField(default=dict)
+
+    def __str__(self):
+        return f"Heartbeat {self.checked_at} ({'ok' if self.ok else 'failing'})"
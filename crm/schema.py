@@ -1,8 +1,10 @@
 import graphene
 from graphene_django import DjangoObjectType
 from django.db import transaction
-from crm.models import Customer, Product, Order
+from crm.models import Customer, Product, Order, Job
 from crm.models import Product
+from crm import archive, cache, jobs, stock
+from crm.tasks import create_customers, restock_low_stock_products
 import re
 
 
@@ -24,6 +26,20 @@ class OrderType(DjangoObjectType):
         model = Order
         fields = ("id", "customer", "products", "total_amount", "order_date", "created_at")
 
+    def resolve_products(self, info):
+        # Archived orders read their product links from the archive
+        archived_order = getattr(self, 'archived_order', None)
+        return (archived_order or self).products.all()
+
+
+class JobType(DjangoObjectType):
+    class Meta:
+        model = Job
+        fields = ("id", "task", "status", "progress", "result", "error",
+                  "created_at", "started_at", "finished_at")
+        # Expose status as the stored string ('pending', 'running', ...)
+        convert_choices_to_enum = False
+
 
 # Input Types
 class CustomerInput(graphene.InputObjectType):
@@ -80,33 +96,7 @@ class BulkCreateCustomers(graphene.Mutation):
     errors = graphene.List(graphene.String)
 
     def mutate(self, info, input):
-        customers = []
-        errors = []
-        
-        for idx, customer_input in enumerate(input):
-            try:
-                # Validate email uniqueness
-                if Customer.objects.filter(email=customer_input.email).exists():
-                    errors.append(f"Row {idx + 1}: Email {customer_input.email} already exists")
-                    continue
-
-                # Validate phone format if provided
-                if customer_input.phone:
-                    phone_pattern = r'^[\+\d\-\s\(\)]+$'
-                    if not re.match(phone_pattern, customer_input.phone):
-                        errors.append(f"Row {idx + 1}: Invalid phone number format")
-                        continue
-
-                customer = Customer(
-                    name=customer_input.name,
-                    email=customer_input.email,
-                    phone=customer_input.phone if customer_input.phone else None
-                )
-                customer.save()
-                customers.append(customer)
-            except Exception as e:
-                errors.append(f"Row {idx + 1}: {str(e)}")
-
+        customers, errors = create_customers(input)
         return BulkCreateCustomers(customers=customers, errors=errors)
 
 
@@ -153,15 +143,16 @@ class CreateOrder(graphene.Mutation):
             raise Exception("At least one product must be provided")
 
         # Validate products exist and calculate total
+        found = cache.get_products(input.product_ids, info.context)
         products = []
         total_amount = 0
         for product_id in input.product_ids:
             try:
-                product = Product.objects.get(id=product_id)
-                products.append(product)
-                total_amount += product.price
-            except Product.DoesNotExist:
+                product = found[int(product_id)]
+            except (KeyError, ValueError):
                 raise Exception(f"Invalid product ID: {product_id}")
+            products.append(product)
+            total_amount += product.price
 
         # Create order
         with transaction.atomic():
@@ -174,20 +165,117 @@ class CreateOrder(graphene.Mutation):
         return CreateOrder(order=order)
 
 
+class ReserveStock(graphene.Mutation):
+    class Arguments:
+        product_id = graphene.ID(required=True)
+        quantity = graphene.Int(required=True)
+        reference = graphene.String()
+
+    product = graphene.Field(ProductType)
+    success = graphene.Boolean()
+    message = graphene.String()
+
+    def mutate(self, info, product_id, quantity, reference=''):
+        product = stock.reserve(product_id, quantity, reference or '')
+        cache.remember(info.context, product)
+        return ReserveStock(
+            product=product,
+            success=True,
+            message=f"Reserved {quantity} of {product.name}"
+        )
+
+
+class ReleaseStock(graphene.Mutation):
+    class Arguments:
+        product_id = graphene.ID(required=True)
+        quantity = graphene.Int(required=True)
+        reference = graphene.String()
+
+    product = graphene.Field(ProductType)
+    success = graphene.Boolean()
+    message = graphene.String()
+
+    def mutate(self, info, product_id, quantity, reference=''):
+        product = stock.release(product_id, quantity, reference or '')
+        cache.remember(info.context, product)
+        return ReleaseStock(
+            product=product,
+            success=True,
+            message=f"Released {quantity} of {product.name}"
+        )
+
+
+class RestockProduct(graphene.Mutation):
+    class Arguments:
+        product_id = graphene.ID(required=True)
+        quantity = graphene.Int(required=True)
+        reference = graphene.String()
+
+    product = graphene.Field(ProductType)
+    success = graphene.Boolean()
+    message = graphene.String()
+
+    def mutate(self, info, product_id, quantity, reference=''):
+        product = stock.restock(product_id, quantity, reference or '')
+        cache.remember(info.context, product)
+        return RestockProduct(
+            product=product,
+            success=True,
+            message=f"Restocked {quantity} of {product.name}"
+        )
+
+
+# Background job mutations: enqueue the work and return the job handle
+class EnqueueBulkCreateCustomers(graphene.Mutation):
+    class Arguments:
+        input = graphene.List(CustomerInput, required=True)
+
+    job = graphene.Field(JobType)
+
+    def mutate(self, info, input):
+        rows = [dict(customer_input) for customer_input in input]
+        job = jobs.enqueue('crm.tasks.bulk_create_customers', customers=rows)
+        return EnqueueBulkCreateCustomers(job=job)
+
+
+class EnqueueUpdateLowStockProducts(graphene.Mutation):
+    job = graphene.Field(JobType)
+
+    def mutate(self, info):
+        job = jobs.enqueue('crm.tasks.update_low_stock_products')
+        return EnqueueUpdateLowStockProducts(job=job)
+
+
+class EnqueueCleanInactiveCustomers(graphene.Mutation):
+    job = graphene.Field(JobType)
+
+    def mutate(self, info):
+        job = jobs.enqueue('crm.tasks.clean_inactive_customers')
+        return EnqueueCleanInactiveCustomers(job=job)
+
+
 # Query
 class Query(graphene.ObjectType):
     all_customers = graphene.List(CustomerType)
     all_products = graphene.List(ProductType)
-    all_orders = graphene.List(OrderType)
+    all_orders = graphene.List(
+        OrderType,
+        order_date__gte=graphene.Date(),
+        order_date__lte=graphene.Date(),
+    )
+    job = graphene.Field(JobType, id=graphene.ID(required=True))
 
     def resolve_all_customers(self, info):
         return Customer.objects.all()
 
     def resolve_all_products(self, info):
-        return Product.objects.all()
+        return cache.all_products(info.context)
+
+    def resolve_all_orders(self, info, order_date__gte=None, order_date__lte=None):
+        return archive.orders_between(order_date__gte, order_date__lte)
 
-    def resolve_all_orders(self, info):
-        return Order.objects.all()
+    def resolve_job(self, info, id):
+        return Job.objects.filter(id=id).first()
 
 
 # Mutation
@@ -204,16 +292,10 @@ class UpdateLowStockProducts(graphene.Mutation):
     message = graphene.String()
     
     def mutate(self, info):
-        # Find products with stock < 10
-        low_stock_products = Product.objects.filter(stock__lt=10)
-        
-        updated_products = []
-        for product in low_stock_products:
-            # Increment stock by 10
-            product.stock += 10
-            product.save()
-            updated_products.append(product)
-        
+        updated_products = restock_low_stock_products()
+        for product in updated_products:
+            cache.remember(info.context, product)
+
         return UpdateLowStockProducts(
             products=updated_products,
             success=True,
@@ -226,3 +308,9 @@ class Mutation(graphene.ObjectType):
     create_product = CreateProduct.Field()
     create_order = CreateOrder.Field()
     update_low_stock_products = UpdateLowStockProducts.Field()
+    reserve_stock = ReserveStock.Field()
+    release_stock = ReleaseStock.Field()
+    restock_product = RestockProduct.Field()
+    enqueue_bulk_create_customers = EnqueueBulkCreateCustomers.Field()
+    enqueue_update_low_stock_products = EnqueueUpdateLowStockProducts.Field()
+    enqueue_clean_inactive_customers = EnqueueCleanInactiveCustomers.Field()
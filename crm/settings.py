@@ -1,6 +1,7 @@
 """
 CRM App Settings
 Django-crontab configuration for scheduled jobs
+The same entries are enqueued by `manage.py run_workers`
 """
 
 # Django Crontab
@@ -10,4 +11,8 @@ INSTALLED_APPS = ['django_crontab']
 CRONJOBS = [
     ('*/5 * * * *', 'crm.cron.log_crm_heartbeat'),
     ('0 */12 * * *', 'crm.cron.update_low_stock'),
+    ('0 2 * * 0', 'crm.tasks.clean_inactive_customers'),
+    ('30 3 * * *', 'crm.stock.compact_ledger'),
+    ('0 4 * * *', 'crm.archive.archive_orders'),
+    ('15 4 * * *', 'crm.jobs.prune_finished'),
 ]
@@ -0,0 +1,29 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from crm.cache import product_cache
+from crm.models import Product
+
+
+def _invalidate(product_id, catalog):
+    product_cache.invalidate(product_id)
+    if catalog:
+        product_cache.invalidate_catalog()
+
+
+# The signals run inside the saving transaction: invalidate right away and
+# again on commit, so a read of the old row in between is not kept cached
+
+@receiver(post_save, sender=Product)
+def invalidate_saved_product(sender, instance, created, **kwargs):
+    _invalidate(instance.id, created)
+    transaction.on_commit(lambda: _invalidate(instance.id, created))
+
+
+@receiver(post_delete, sender=Product)
+def invalidate_deleted_product(sender, instance, **kwargs):
+    # The instance id is cleared after the signal
+    product_id = instance.id
+    _invalidate(product_id, True)
+    transaction.on_commit(lambda: _invalidate(product_id, True))
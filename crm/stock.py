@@ -0,0 +1,136 @@
+"""
+CRM Stock Reservations
+Optimistic-concurrency stock updates backed by the StockMovement ledger
+
+Every change reads the product's version and only applies if the version
+is unchanged (compare-and-swap), retrying a bounded number of times.
+No row locks are held between the read and the write.
+"""
+
+import random
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Max, Sum
+from django.utils import timezone
+
+from crm.cache import product_cache
+from crm.models import Product, StockMovement
+
+
+class StockError(Exception):
+    pass
+
+
+class InsufficientStock(StockError):
+    pass
+
+
+class StockConflict(StockError):
+    """Raised when the retries are exhausted by concurrent updates."""
+
+
+def _backoff(attempt):
+    # Jittered exponential backoff: up to 1, 2, 4, ... ms
+    time.sleep(random.uniform(0, 0.001 * 2 ** attempt))
+
+
+def apply_movement(product_id, quantity, kind, reference=''):
+    """
+    Changes the product's stock by the signed `quantity` and records it in
+    the ledger. Returns the updated product.
+    """
+    max_retries = getattr(settings, 'STOCK_RESERVATION_MAX_RETRIES', 5)
+
+    for attempt in range(max_retries):
+        try:
+            product = Product.objects.get(id=product_id)
+        except Product.DoesNotExist:
+            raise StockError(f"Invalid product ID: {product_id}")
+
+        new_stock = product.stock + quantity
+        if new_stock < 0:
+            raise InsufficientStock(
+                f"Insufficient stock for {product.name}: {product.stock} available"
+            )
+
+        with transaction.atomic():
+            updated = Product.objects.filter(id=product.id, version=product.version).update(
+                stock=new_stock,
+                version=product.version + 1,
+            )
+            if updated:
+                StockMovement.objects.create(
+                    product=product,
+                    kind=kind,
+                    quantity=quantity,
+                    reference=reference,
+                )
+                # update() bypasses the Product signals
+                transaction.on_commit(lambda: product_cache.invalidate(product.id))
+                product.stock = new_stock
+                product.version += 1
+                product._remember_stock()
+                return product
+
+        _backoff(attempt)
+
+    raise StockConflict(
+        f"Stock of product {product_id} changed concurrently, retried {max_retries} times"
+    )
+
+
+def reserve(product_id, quantity, reference=''):
+    if quantity <= 0:
+        raise StockError("Quantity must be positive")
+    return apply_movement(product_id, -quantity, StockMovement.KIND_RESERVE, reference)
+
+
+def release(product_id, quantity, reference=''):
+    if quantity <= 0:
+        raise StockError("Quantity must be positive")
+    return apply_movement(product_id, quantity, StockMovement.KIND_RELEASE, reference)
+
+
+def restock(product_id, quantity, reference=''):
+    if quantity <= 0:
+        raise StockError("Quantity must be positive")
+    return apply_movement(product_id, quantity, StockMovement.KIND_RESTOCK, reference)
+
+
+def compact_ledger(retention_days=None):
+    """
+    Merges each product's movements older than the retention period into a
+    single 'compacted' movement. Product.stock is not touched.
+    """
+    if retention_days is None:
+        retention_days = getattr(settings, 'STOCK_LEDGER_RETENTION_DAYS', 30)
+    cutoff = timezone.now() - timedelta(days=retention_days)
+
+    old_movements = StockMovement.objects.filter(created_at__lt=cutoff)
+    product_ids = list(
+        old_movements.values('product')
+        .annotate(count=Count('id'))
+        .filter(count__gt=1)
+        .values_list('product', flat=True)
+    )
+
+    compacted = 0
+    for product_id in product_ids:
+        with transaction.atomic():
+            movements = old_movements.filter(product_id=product_id)
+            summary = movements.aggregate(
+                count=Count('id'), total=Sum('quantity'), latest=Max('created_at')
+            )
+            movements.delete()
+            StockMovement.objects.create(
+                product_id=product_id,
+                kind=StockMovement.KIND_COMPACTED,
+                quantity=summary['total'],
+                created_at=summary['latest'],
+            )
+            compacted += summary['count']
+
+    return {'compacted': compacted}
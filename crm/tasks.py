@@ -0,0 +1,104 @@
+"""
+CRM Background Tasks
+Heavy operations shared by the GraphQL mutations and the job queue
+"""
+
+import re
+from datetime import timedelta
+
+from django.utils import timezone
+
+from crm import stock
+from crm.jobs import report_progress
+from crm.models import Customer, Product
+
+
+PROGRESS_EVERY = 100
+
+
+def create_customers(rows):
+    """
+    Validates and saves customer rows.
+    Returns the created customers and the per-row error messages.
+    """
+    customers = []
+    errors = []
+    total = len(rows)
+
+    for idx, row in enumerate(rows):
+        try:
+            # Validate email uniqueness
+            if Customer.objects.filter(email=row['email']).exists():
+                errors.append(f"Row {idx + 1}: Email {row['email']} already exists")
+                continue
+
+            # Validate phone format if provided
+            phone = row.get('phone')
+            if phone:
+                phone_pattern = r'^[\+\d\-\s\(\)]+$'
+                if not re.match(phone_pattern, phone):
+                    errors.append(f"Row {idx + 1}: Invalid phone number format")
+                    continue
+
+            customer = Customer(
+                name=row['name'],
+                email=row['email'],
+                phone=phone if phone else None
+            )
+            customer.save()
+            customers.append(customer)
+        except Exception as e:
+            errors.append(f"Row {idx + 1}: {str(e)}")
+
+        if (idx + 1) % PROGRESS_EVERY == 0:
+            report_progress((idx + 1) * 100 / total)
+
+    return customers, errors
+
+
+def restock_low_stock_products():
+    """
+    Increments the stock of every product with stock < 10 by 10.
+    Returns the updated products.
+    """
+    # Find products with stock < 10
+    low_stock_ids = Product.objects.filter(stock__lt=10).values_list('id', flat=True)
+
+    # Increment stock by 10 without overwriting concurrent reservations
+    return [stock.restock(product_id, 10, reference='low-stock') for product_id in low_stock_ids]
+
+
+# Job queue entry points: keyword arguments in, JSON-serializable results out
+
+def bulk_create_customers(customers):
+    created, errors = create_customers(customers)
+    return {
+        'created': [customer.id for customer in created],
+        'errors': errors,
+    }
+
+
+def update_low_stock_products():
+    products = restock_low_stock_products()
+    return {
+        'updated': [
+            {'id': product.id, 'name': product.name, 'stock': product.stock}
+            for product in products
+        ],
+    }
+
+
+def clean_inactive_customers():
+    """
+    Deletes customers with no orders in the past year.
+    Archived orders count too, in case the archive horizon is shorter.
+    """
+    one_year_ago = timezone.now() - timedelta(days=365)
+    inactive_customers = Customer.objects.exclude(
+        orders__created_at__gte=one_year_ago
+    ).exclude(
+        archived_orders__created_at__gte=one_year_ago
+    )
+    count = inactive_customers.count()
+    inactive_customers.delete()
+    return {'deleted': count}
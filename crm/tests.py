@@ -1,3 +1,613 @@
-from django.test import TestCase
+import json
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+from io import StringIO
+from pathlib import Path
+from unittest import mock
 
-# Create your tests here.
+from django.core.management import call_command
+from django.db import transaction
+from django.db.models import Sum
+from django.test import LiveServerTestCase, SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+
+from crm import archive, health, jobs, stock
+from crm.cron import SCHEMA_FILE
+from crm.cache import ProductCache, product_cache
+from crm.models import ArchivedOrder, Customer, Heartbeat, Job, Order, Product, StockMovement
+
+
+# Tasks used by the job tests, referenced by dotted path
+
+def add_task(a, b):
+    jobs.report_progress(50)
+    return {'sum': a + b}
+
+
+def failing_task():
+    raise ValueError("boom")
+
+
+def unserializable_task():
+    return object()
+
+
+class CronMatchesTests(TestCase):
+    # 2026-10-18 is a Sunday
+    sunday = datetime(2026, 10, 18, 2, 0)
+
+    def test_steps(self):
+        self.assertTrue(jobs.cron_matches('*/5 * * * *', datetime(2026, 10, 19, 8, 15)))
+        self.assertFalse(jobs.cron_matches('*/5 * * * *', datetime(2026, 10, 19, 8, 17)))
+        self.assertTrue(jobs.cron_matches('0 */12 * * *', datetime(2026, 10, 19, 12, 0)))
+        self.assertFalse(jobs.cron_matches('0 */12 * * *', datetime(2026, 10, 19, 6, 0)))
+        self.assertTrue(jobs.cron_matches('5/10 * * * *', datetime(2026, 10, 19, 6, 25)))
+
+    def test_ranges_and_lists(self):
+        self.assertTrue(jobs.cron_matches('0 9-17 * * 1-5', datetime(2026, 10, 19, 12, 0)))
+        self.assertFalse(jobs.cron_matches('0 9-17 * * 1-5', datetime(2026, 10, 19, 18, 0)))
+        self.assertFalse(jobs.cron_matches('0 9-17 * * 1-5', datetime(2026, 10, 17, 12, 0)))
+        self.assertTrue(jobs.cron_matches('0,30 * * * *', datetime(2026, 10, 19, 6, 30)))
+
+    def test_sunday_is_zero_or_seven(self):
+        self.assertTrue(jobs.cron_matches('0 2 * * 0', self.sunday))
+        self.assertTrue(jobs.cron_matches('0 2 * * 7', self.sunday))
+        self.assertTrue(jobs.cron_matches('0 2 * * 5-7', self.sunday))
+        self.assertFalse(jobs.cron_matches('0 2 * * 7', datetime(2026, 10, 19, 2, 0)))
+
+    def test_day_and_weekday_match_either(self):
+        # 2026-10-01 is a Thursday, 2026-10-19 a Monday
+        self.assertTrue(jobs.cron_matches('0 0 1 * 1', datetime(2026, 10, 1, 0, 0)))
+        self.assertTrue(jobs.cron_matches('0 0 1 * 1', datetime(2026, 10, 19, 0, 0)))
+        self.assertFalse(jobs.cron_matches('0 0 1 * 1', datetime(2026, 10, 20, 0, 0)))
+        # An unrestricted day of month still requires the weekday
+        self.assertFalse(jobs.cron_matches('0 0 */2 * 1', datetime(2026, 10, 1, 0, 0)))
+
+    def test_names_and_macros(self):
+        self.assertTrue(jobs.cron_matches('0 9 * jan-dec mon-fri', datetime(2026, 10, 19, 9, 0)))
+        self.assertTrue(jobs.cron_matches('0 2 * * SUN', self.sunday))
+        self.assertFalse(jobs.cron_matches('0 2 * OCT sat', self.sunday))
+        self.assertTrue(jobs.cron_matches('@daily', datetime(2026, 10, 19, 0, 0)))
+        self.assertFalse(jobs.cron_matches('@daily', datetime(2026, 10, 19, 1, 0)))
+        self.assertTrue(jobs.cron_matches('@weekly', datetime(2026, 10, 18, 0, 0)))
+
+    def test_invalid_expressions(self):
+        for expression in ['* * * *', '60 * * * *', '* * * * mo', '*/0 * * * *', '5-1 * * * *', '@reboot']:
+            with self.subTest(expression=expression), self.assertRaises(ValueError):
+                jobs.parse_cron(expression)
+
+    def test_check_cron_entry(self):
+        jobs.check_cron_entry(('@hourly', 'crm.tests.add_task', [], {'a': 1, 'b': 2}))
+        with self.assertRaisesMessage(ValueError, 'Positional arguments'):
+            jobs.check_cron_entry(('@hourly', 'crm.tests.add_task', [1, 2]))
+        with self.assertRaises(ImportError):
+            jobs.check_cron_entry(('@hourly', 'crm.tests.missing_task'))
+
+    def test_run_workers_rejects_invalid_entries(self):
+        from django.core.management.base import CommandError
+
+        cronjobs = [('0 2 * * mo', 'crm.tests.add_task')]
+        with mock.patch('crm.management.commands.run_workers.CRONJOBS', cronjobs), \
+                self.assertRaisesMessage(CommandError, "'0 2 * * mo'"):
+            call_command('run_workers', burst=True, stdout=StringIO())
+
+    def test_project_cronjobs_are_valid(self):
+        from crm.settings import CRONJOBS
+
+        for entry in CRONJOBS:
+            jobs.check_cron_entry(entry)
+
+    def test_schedule_cron_jobs_passes_kwargs(self):
+        cronjobs = [
+            ('0 2 * * 0', 'crm.tests.add_task', [], {'a': 1, 'b': 2}),
+            ('0 3 * * *', 'crm.tests.failing_task'),
+        ]
+        scheduled = jobs.schedule_cron_jobs(cronjobs, self.sunday)
+        self.assertEqual([(job.task, job.payload) for job in scheduled],
+                         [('crm.tests.add_task', {'a': 1, 'b': 2})])
+
+
+class JobQueueTests(TestCase):
+    def test_claim_next_claims_each_job_once(self):
+        first = jobs.enqueue('crm.tests.add_task', a=1, b=2)
+        second = jobs.enqueue('crm.tests.add_task', a=3, b=4)
+
+        claimed = [jobs.claim_next(), jobs.claim_next(), jobs.claim_next()]
+
+        self.assertEqual([job.id for job in claimed[:2]], [first.id, second.id])
+        self.assertIsNone(claimed[2])
+        self.assertTrue(all(job.status == Job.STATUS_RUNNING for job in claimed[:2]))
+
+    def test_successful_job_lifecycle(self):
+        job = jobs.enqueue('crm.tests.add_task', a=1, b=2)
+        jobs.claim_next()
+
+        self.assertEqual(jobs.run_job(job.id), Job.STATUS_SUCCEEDED)
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.STATUS_SUCCEEDED)
+        self.assertEqual(job.progress, 100)
+        self.assertEqual(job.result, {'sum': 3})
+        self.assertIsNotNone(job.finished_at)
+
+    def test_failing_job_records_error(self):
+        job = jobs.enqueue('crm.tests.failing_task')
+        jobs.claim_next()
+
+        self.assertEqual(jobs.run_job(job.id), Job.STATUS_FAILED)
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.STATUS_FAILED)
+        self.assertIn('ValueError: boom', job.error)
+
+    def test_unserializable_result_fails_job(self):
+        job = jobs.enqueue('crm.tests.unserializable_task')
+        jobs.claim_next()
+
+        self.assertEqual(jobs.run_job(job.id), Job.STATUS_FAILED)
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.STATUS_FAILED)
+
+    def test_job_query_returns_status(self):
+        from alx_backend_graphql.schema import schema
+
+        job = jobs.enqueue('crm.tests.add_task', a=1, b=2)
+        result = schema.execute('{ job(id: %d) { status progress } }' % job.id)
+
+        self.assertIsNone(result.errors)
+        self.assertEqual(result.data['job'], {'status': 'pending', 'progress': 0})
+
+    def test_prune_finished_keeps_recent_and_unfinished_jobs(self):
+        old = timezone.now() - timedelta(days=8)
+        succeeded = jobs.enqueue('crm.tests.add_task', a=1, b=2)
+        failed = jobs.enqueue('crm.tests.failing_task')
+        recent = jobs.enqueue('crm.tests.add_task', a=3, b=4)
+        pending = jobs.enqueue('crm.tests.add_task', a=5, b=6)
+        Job.objects.filter(id__in=[succeeded.id, recent.id]).update(status=Job.STATUS_SUCCEEDED)
+        Job.objects.filter(id=failed.id).update(status=Job.STATUS_FAILED)
+        Job.objects.filter(id__in=[succeeded.id, failed.id]).update(finished_at=old)
+        Job.objects.filter(id=recent.id).update(finished_at=timezone.now())
+
+        self.assertEqual(jobs.prune_finished(retention_days=7), {'deleted': 2})
+        self.assertEqual(set(Job.objects.values_list('id', flat=True)), {recent.id, pending.id})
+
+
+class BatchGraphQLViewTests(TestCase):
+    def post(self, body):
+        return self.client.post('/graphql/', json.dumps(body), content_type='application/json')
+
+    def test_results_come_back_in_order(self):
+        Product.objects.create(name='Widget', price=5, stock=1)
+        response = self.post([
+            {'query': '{ allProducts { name } }', 'id': 'first'},
+            {'query': '{ allCustomers { name } }', 'id': 'second'},
+        ])
+
+        self.assertEqual(response.status_code, 200)
+        results = response.json()
+        self.assertEqual([result['id'] for result in results], ['first', 'second'])
+        self.assertEqual(results[0]['data'], {'allProducts': [{'name': 'Widget'}]})
+        self.assertEqual(results[1]['data'], {'allCustomers': []})
+
+    def test_single_operation_is_unchanged(self):
+        response = self.post({'query': '{ allCustomers { name } }'})
+
+        self.assertEqual(response.json(), {'data': {'allCustomers': []}})
+
+    @override_settings(GRAPHQL_BATCH_MAX_SIZE=2)
+    def test_batch_size_limit(self):
+        response = self.post([{'query': '{ allCustomers { name } }'}] * 3)
+
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('the limit is 2', response.json()['errors'][0]['message'])
+
+    def test_empty_batch(self):
+        response = self.post([])
+
+        self.assertEqual(response.status_code, 400)
+
+    def test_non_object_entries(self):
+        response = self.post([1, 2])
+
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('JSON object', response.json()['errors'][0]['message'])
+
+    def test_operations_share_the_request_context(self):
+        customer = Customer.objects.create(name='Ada', email='ada@example.com')
+        product = Product.objects.create(name='Widget', price=5, stock=1)
+        create_order = {
+            'query': 'mutation($c: ID!, $p: ID!) { createOrder(input: {customerId: $c, productIds: [$p]}) { order { id } } }',
+            'variables': {'c': customer.id, 'p': product.id},
+        }
+        product_cache.clear()
+
+        with mock.patch.object(product_cache, 'get_many', wraps=product_cache.get_many) as get_many:
+            response = self.post([create_order, create_order])
+
+        self.assertEqual([result['status'] for result in response.json()], [200, 200])
+        # The second operation reuses the product materialized by the first
+        self.assertEqual(get_many.call_count, 1)
+
+
+class SchemaArtifactTests(SimpleTestCase):
+    def test_schema_graphql_is_up_to_date(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            out = Path(tmp) / 'schema.graphql'
+            call_command('graphql_schema', out=str(out), stdout=StringIO())
+            generated = out.read_text()
+
+        self.assertEqual(
+            SCHEMA_FILE.read_text(), generated,
+            "schema.graphql is stale, run `python manage.py graphql_schema`",
+        )
+
+
+class StockTests(TestCase):
+    def setUp(self):
+        self.product = Product.objects.create(name='Widget', price=5, stock=10)
+
+    def ledger_total(self):
+        return StockMovement.objects.filter(product=self.product).aggregate(
+            total=Sum('quantity'))['total']
+
+    def test_initial_stock_is_in_the_ledger(self):
+        self.assertEqual(self.ledger_total(), 10)
+
+    def test_reserve_and_release(self):
+        product = stock.reserve(self.product.id, 4, reference='order-1')
+        self.assertEqual((product.stock, product.version), (6, 1))
+
+        product = stock.release(self.product.id, 1, reference='order-1')
+        self.assertEqual((product.stock, product.version), (7, 2))
+
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.stock, 7)
+        self.assertEqual(self.ledger_total(), 7)
+
+    def test_insufficient_stock(self):
+        with self.assertRaises(stock.InsufficientStock):
+            stock.reserve(self.product.id, 11)
+
+        self.product.refresh_from_db()
+        self.assertEqual((self.product.stock, self.product.version), (10, 0))
+        self.assertEqual(self.ledger_total(), 10)
+
+    def test_invalid_quantity_and_product(self):
+        with self.assertRaises(stock.StockError):
+            stock.reserve(self.product.id, 0)
+        with self.assertRaises(stock.StockError):
+            stock.release(0, 1)
+
+    def test_stale_version_is_retried(self):
+        stale = Product.objects.get(id=self.product.id)
+        stock.reserve(self.product.id, 1)
+
+        # A compare-and-swap with the stale version matches no row
+        self.assertEqual(
+            Product.objects.filter(id=stale.id, version=stale.version).update(stock=0), 0
+        )
+        self.assertEqual(stock.reserve(self.product.id, 1).stock, 8)
+
+    def test_save_does_not_overwrite_stock(self):
+        stale = Product.objects.get(id=self.product.id)
+        stock.reserve(self.product.id, 3)
+
+        stale.name = 'Renamed'
+        stale.save()
+
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.name, 'Renamed')
+        self.assertEqual((self.product.stock, self.product.version), (7, 1))
+
+    def test_changing_stock_on_the_instance_raises(self):
+        product = Product.objects.get(id=self.product.id)
+        product.stock = 50
+        with self.assertRaises(stock.StockError):
+            product.save()
+        with self.assertRaises(stock.StockError):
+            product.save(update_fields=['stock'])
+
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.stock, 10)
+
+    def test_saving_after_stock_changes_is_allowed(self):
+        product = stock.restock(self.product.id, 5)
+        product.name = 'Renamed'
+        product.save()
+
+        self.product.refresh_from_db()
+        self.product.name = 'Renamed again'
+        self.product.save()
+        self.assertEqual((self.product.stock, self.product.version), (15, 1))
+
+    def test_restock_mutation(self):
+        from alx_backend_graphql.schema import schema
+
+        result = schema.execute(
+            'mutation { restockProduct(productId: %d, quantity: 5, reference: "po-1") '
+            '{ success product { stock } } }' % self.product.id
+        )
+
+        self.assertIsNone(result.errors)
+        self.assertEqual(result.data['restockProduct'], {'success': True, 'product': {'stock': 15}})
+        movement = StockMovement.objects.latest('id')
+        self.assertEqual((movement.kind, movement.quantity, movement.reference),
+                         (StockMovement.KIND_RESTOCK, 5, 'po-1'))
+
+    def test_compact_ledger_preserves_sum(self):
+        for _ in range(3):
+            stock.reserve(self.product.id, 1)
+        stock.release(self.product.id, 1)
+        recent = stock.reserve(self.product.id, 2)
+        StockMovement.objects.exclude(quantity=-2).update(
+            created_at=timezone.now() - timedelta(days=40)
+        )
+
+        result = stock.compact_ledger(retention_days=30)
+
+        movements = StockMovement.objects.filter(product=self.product)
+        self.assertEqual(result, {'compacted': 5})
+        self.assertEqual(movements.count(), 2)
+        self.assertEqual(movements.get(kind=StockMovement.KIND_COMPACTED).quantity, 8)
+        self.assertEqual(self.ledger_total(), recent.stock)
+
+
+class ProductCacheTests(TestCase):
+    def setUp(self):
+        product_cache.clear()
+        self.product = Product.objects.create(name='Widget', price=5, stock=10)
+
+    def test_repeated_reads_hit_the_cache(self):
+        product_cache.get(self.product.id)
+        with self.assertNumQueries(0):
+            self.assertEqual(product_cache.get(self.product.id).name, 'Widget')
+
+    def test_save_invalidates(self):
+        product_cache.get(self.product.id)
+        self.product.price = 7
+        self.product.save()
+
+        self.assertEqual(product_cache.get(self.product.id).price, 7)
+
+    def test_create_and_delete_invalidate_the_catalog(self):
+        self.assertEqual([p.name for p in product_cache.all()], ['Widget'])
+        other = Product.objects.create(name='Gadget', price=3)
+        self.assertEqual([p.name for p in product_cache.all()], ['Widget', 'Gadget'])
+
+        other.delete()
+        self.assertEqual([p.name for p in product_cache.all()], ['Widget'])
+        self.assertIsNone(product_cache.get(other.id))
+
+    def test_reserve_invalidates(self):
+        product_cache.get(self.product.id)
+        with self.captureOnCommitCallbacks(execute=True):
+            stock.reserve(self.product.id, 4)
+
+        self.assertEqual(product_cache.get(self.product.id).stock, 6)
+
+    def test_invalidation_during_read_is_not_lost(self):
+        in_bulk = Product.objects.in_bulk
+
+        def racing_in_bulk(ids):
+            # Read the old row, then let a save land before the cache stores it
+            stale = in_bulk(ids)
+            Product.objects.filter(id=self.product.id).update(price=9)
+            product_cache.invalidate(self.product.id)
+            return stale
+
+        with mock.patch.object(Product.objects, 'in_bulk', side_effect=racing_in_bulk):
+            self.assertEqual(product_cache.get(self.product.id).price, 5)
+
+        self.assertEqual(product_cache.get(self.product.id).price, 9)
+
+    def test_read_before_commit_is_not_kept(self):
+        product_cache.get(self.product.id)
+        committed = Product.objects.get(id=self.product.id)
+
+        def concurrent_read():
+            # Another connection still sees the committed row until the commit
+            with mock.patch.object(Product.objects, 'in_bulk', return_value={committed.id: committed}):
+                product_cache.get(self.product.id)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            with transaction.atomic():
+                self.product.price = 9
+                self.product.save()
+                reader = threading.Thread(target=concurrent_read)
+                reader.start()
+                reader.join()
+                self.assertEqual(product_cache.get(self.product.id).price, 5)
+
+        self.assertEqual(product_cache.get(self.product.id).price, 9)
+
+    def test_lru_eviction(self):
+        cache = ProductCache(max_size=1, ttl=60)
+        other = Product.objects.create(name='Gadget', price=3)
+
+        cache.get(self.product.id)
+        cache.get(other.id)
+
+        self.assertEqual(cache.stats()['evictions'], 1)
+        self.assertEqual(cache.stats()['size'], 1)
+
+
+class OrderArchiveTests(TestCase):
+    def setUp(self):
+        self.customer = Customer.objects.create(name='Ada', email='ada@example.com')
+        self.products = [
+            Product.objects.create(name='Widget', price=5),
+            Product.objects.create(name='Gadget', price=3),
+        ]
+        self.old_date = timezone.now() - timedelta(days=400)
+        self.old = self.create_order(self.old_date)
+        self.recent = self.create_order(timezone.now() - timedelta(days=2))
+
+    def create_order(self, order_date):
+        order = Order.objects.create(customer=self.customer, total_amount=8)
+        order.products.set(self.products)
+        Order.objects.filter(id=order.id).update(order_date=order_date, created_at=order_date)
+        return Order.objects.get(id=order.id)
+
+    def query_orders(self, start_date):
+        from alx_backend_graphql.schema import schema
+
+        result = schema.execute(
+            'query($d: Date!) { allOrders(orderDate_Gte: $d) { id products { name } } }',
+            variable_values={'d': start_date.date().isoformat()},
+        )
+        self.assertIsNone(result.errors)
+        return result.data['allOrders']
+
+    def test_archive_query_restore_round_trip(self):
+        self.assertEqual(archive.archive_orders(batch_size=1), {'archived': 1})
+
+        self.assertFalse(Order.objects.filter(id=self.old.id).exists())
+        archived = ArchivedOrder.objects.get(id=self.old.id)
+        self.assertEqual(archived.order_date, self.old.order_date)
+        self.assertEqual(set(archived.products.all()), set(self.products))
+
+        # Hot-only reads do not see it, ranges past the horizon do
+        recent_ids = [order['id'] for order in self.query_orders(timezone.now() - timedelta(days=7))]
+        self.assertEqual(recent_ids, [str(self.recent.id)])
+        all_orders = self.query_orders(self.old_date - timedelta(days=1))
+        self.assertEqual([order['id'] for order in all_orders], [str(self.old.id), str(self.recent.id)])
+        self.assertEqual(sorted(p['name'] for p in all_orders[0]['products']), ['Gadget', 'Widget'])
+
+        self.assertEqual(archive.restore_orders(), {'restored': 1})
+
+        restored = Order.objects.get(id=self.old.id)
+        self.assertEqual(restored.order_date, self.old.order_date)
+        self.assertEqual(restored.created_at, self.old.created_at)
+        self.assertIsNotNone(restored.restored_at)
+        self.assertEqual(set(restored.products.all()), set(self.products))
+        self.assertFalse(ArchivedOrder.objects.exists())
+
+    def test_restored_orders_are_not_archived_again(self):
+        archive.archive_orders()
+        archive.restore_orders()
+
+        self.assertEqual(archive.archive_orders(), {'archived': 0})
+        self.assertTrue(Order.objects.filter(id=self.old.id).exists())
+
+        self.assertEqual(archive.archive_orders(include_restored=True), {'archived': 1})
+
+    def test_orders_archived_with_a_shorter_horizon_are_found(self):
+        mid = self.create_order(timezone.now() - timedelta(days=40))
+        self.assertEqual(archive.archive_orders(horizon_days=30), {'archived': 2})
+
+        ids = [order['id'] for order in self.query_orders(timezone.now() - timedelta(days=60))]
+        self.assertEqual(ids, [str(mid.id), str(self.recent.id)])
+        ids = [order['id'] for order in self.query_orders(timezone.now() - timedelta(days=7))]
+        self.assertEqual(ids, [str(self.recent.id)])
+
+
+def failing_check():
+    raise Exception("database is down")
+
+
+class HealthTests(TestCase):
+    def setUp(self):
+        self.release = threading.Event()
+        self.addCleanup(self.release.set)
+
+    def hung_check(self):
+        self.release.wait(5)
+
+    def test_run_checks_times_out(self):
+        start = time.monotonic()
+        outcome = health.run_checks(timeout=0.1, checks={'hung': self.hung_check, 'cache': health.check_cache})
+
+        self.assertLess(time.monotonic() - start, 1)
+        self.assertFalse(outcome['ok'])
+        self.assertIn('Timed out', outcome['checks']['hung']['error'])
+        self.assertTrue(outcome['checks']['cache']['ok'])
+
+    def test_hung_check_is_not_resubmitted(self):
+        calls = []
+
+        def hung_check():
+            calls.append(1)
+            self.release.wait(5)
+
+        for _ in range(3):
+            outcome = health.run_checks(timeout=0.05, checks={'hung': hung_check})
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(outcome['checks']['hung']['error'], "Still running since a previous run")
+        threads = [thread for thread in threading.enumerate() if thread.name.startswith('health-check')]
+        self.assertLessEqual(len(threads), health.executor.max_workers)
+        self.assertTrue(all(thread.daemon for thread in threads))
+
+    def test_latency_quantiles_past_the_last_bucket(self):
+        histogram = health.RollingHistogram()
+        for _ in range(90):
+            histogram.observe(0.001)
+        for _ in range(10):
+            histogram.observe(6)
+
+        snapshot = histogram.snapshot()
+        self.assertEqual(snapshot['p50_ms'], 5)
+        self.assertEqual(snapshot['p95_ms'], '+Inf')
+        self.assertEqual(snapshot['p99_ms'], '+Inf')
+        self.assertEqual(snapshot['buckets']['le_inf'], 10)
+        self.assertIsNone(health.RollingHistogram().snapshot()['p99_ms'])
+
+    def test_readyz_ok(self):
+        response = self.client.get('/readyz')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(set(response.json()['checks']), {'database', 'schema', 'cache'})
+
+    def test_readyz_returns_503_when_a_check_fails(self):
+        with mock.patch.dict(health.CHECKS, {'database': failing_check}):
+            response = self.client.get('/readyz')
+
+        self.assertEqual(response.status_code, 503)
+        body = response.json()
+        self.assertEqual(body['status'], 'failing')
+        self.assertEqual(body['checks']['database']['error'], 'database is down')
+        self.assertIsNone(body['last_heartbeat'])
+
+    def test_heartbeat_records_endpoint_probe(self):
+        with mock.patch.object(health, 'check_endpoint', return_value=None):
+            heartbeat = health.record_heartbeat()
+
+        self.assertTrue(heartbeat.ok)
+        self.assertTrue(Heartbeat.objects.filter(id=heartbeat.id).exists())
+        self.assertIn('latency_ms', heartbeat.checks['endpoint'])
+
+    def test_heartbeat_records_unreachable_endpoint(self):
+        with mock.patch.object(health, 'check_endpoint', side_effect=ConnectionError("refused")):
+            heartbeat = health.record_heartbeat()
+
+        self.assertFalse(heartbeat.ok)
+        self.assertEqual(heartbeat.checks['endpoint']['error'], 'refused')
+        self.assertTrue(Heartbeat.objects.filter(id=heartbeat.id).exists())
+
+    @override_settings(HEALTH_CHECK_TIMEOUT=0.1)
+    def test_heartbeat_is_not_written_when_database_times_out(self):
+        with mock.patch.object(health, 'check_endpoint', return_value=None), \
+                mock.patch.dict(health.CHECKS, {'database': self.hung_check}):
+            heartbeat = health.record_heartbeat()
+
+        self.assertFalse(heartbeat.ok)
+        self.assertIsNone(heartbeat.pk)
+        self.assertFalse(Heartbeat.objects.exists())
+
+
+class HeartbeatEndpointTests(LiveServerTestCase):
+    def test_heartbeat_probes_the_served_endpoint(self):
+        from crm import cron
+
+        before = health.graphql_latency.snapshot()['count']
+        with mock.patch.object(cron, 'GRAPHQL_URL', f"{self.live_server_url}/graphql/"):
+            cron.log_crm_heartbeat()
+
+        heartbeat = Heartbeat.objects.get()
+        self.assertTrue(heartbeat.ok)
+        self.assertTrue(heartbeat.checks['endpoint']['ok'])
+        # The probe went through the view and its latency was recorded
+        self.assertEqual(health.graphql_latency.snapshot()['count'], before + 1)
@@ -1,3 +1,87 @@
-from django.shortcuts import render
+import json
+import time
 
-# Create your views here.
+from django.conf import settings
+from django.http import HttpResponseBadRequest, JsonResponse
+from graphene_django.views import GraphQLView, HttpError
+
+from crm import health
+from crm.cache import product_cache
+
+
+class BatchGraphQLView(GraphQLView):
+    """
+    GraphQL view that also accepts a JSON array of operations.
+
+    The operations run in order within the same request, so they share the
+    request context, and results come back in the same order.
+    Single operations and GraphiQL behave as in GraphQLView.
+    """
+
+    def dispatch(self, request, *args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return super().dispatch(request, *args, **kwargs)
+        finally:
+            health.graphql_latency.observe(time.perf_counter() - start)
+
+    def parse_body(self, request):
+        if self.get_content_type(request) == "application/json":
+            try:
+                body = json.loads(request.body.decode("utf-8"))
+            except (TypeError, ValueError):
+                body = None
+
+            if isinstance(body, list):
+                max_size = getattr(settings, 'GRAPHQL_BATCH_MAX_SIZE', 10)
+                if not body:
+                    raise HttpError(HttpResponseBadRequest(
+                        "Received an empty list in the batch request."
+                    ))
+                if len(body) > max_size:
+                    raise HttpError(HttpResponseBadRequest(
+                        f"Batch contains {len(body)} operations, the limit is {max_size}."
+                    ))
+                if not all(isinstance(entry, dict) for entry in body):
+                    raise HttpError(HttpResponseBadRequest(
+                        "Every operation in a batch must be a JSON object."
+                    ))
+                # as_view() builds a view instance per request
+                self.batch = True
+                self.graphiql = False
+                return body
+
+            if isinstance(body, dict):
+                return body
+
+        return super().parse_body(request)
+
+
+def metrics(request):
+    """
+    Process-level metrics as JSON.
+    """
+    return JsonResponse({
+        'product_cache': product_cache.stats(),
+        'graphql_latency': health.graphql_latency.snapshot(),
+    })
+
+
+def healthz(request):
+    """
+    Liveness: the process is up and serving requests.
+    """
+    return JsonResponse({
+        'status': 'ok',
+        'graphql_latency': health.graphql_latency.snapshot(),
+    })
+
+
+def readyz(request):
+    """
+    Readiness: database, schema execution and cache checks pass.
+    """
+    outcome = health.run_checks()
+    outcome['status'] = 'ok' if outcome['ok'] else 'failing'
+    outcome['last_heartbeat'] = health.last_heartbeat() if outcome['checks']['database']['ok'] else None
+    return JsonResponse(outcome, status=200 if outcome['ok'] else 503)
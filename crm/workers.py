@@ -0,0 +1,31 @@
+"""
+CRM Job Workers
+Entry points executed inside the run_workers process pool
+
+Worker processes are spawned, so this module must stay importable
+before Django is set up: Django imports happen inside the functions.
+"""
+
+
+def init_worker():
+    """
+    Sets up Django once per worker process.
+    """
+    import django
+    from django.apps import apps
+
+    if not apps.ready:
+        django.setup()
+
+
+def execute_job(job_id):
+    """
+    Runs a claimed job and releases the process' database connections.
+    """
+    from django.db import connections
+    from crm.jobs import run_job
+
+    try:
+        return run_job(job_id)
+    finally:
+        connections.close_all()